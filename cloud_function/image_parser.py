@@ -2,7 +2,9 @@
 Container image name parser
 Handles various image name formats from different registries
 """
-from typing import Dict
+import functools
+from types import MappingProxyType
+from typing import Mapping
 
 
 class ImageParser:
@@ -12,7 +14,7 @@ class ImageParser:
     """
 
     @staticmethod
-    def parse(image_name: str) -> Dict:
+    def parse(image_name: str) -> Mapping:
         """
         Parse a container image name into components
 
@@ -20,7 +22,7 @@ class ImageParser:
             image_name: Full image name (e.g., docker.io/library/nginx:latest)
 
         Returns:
-            Dictionary with parsed components:
+            Read-only mapping with parsed components:
                 - registry: Registry hostname
                 - repository: Repository path
                 - tag: Image tag
@@ -33,49 +35,62 @@ class ImageParser:
             us-docker.pkg.dev/project/repo/app:latest -> us-docker.pkg.dev/project/repo/app:latest
             nginx@sha256:abc123 -> docker.io/library/nginx@sha256:abc123
         """
-        # Handle digest format (image@sha256:...)
+        return _parse_cached(image_name)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_cached(image_name: str) -> Mapping:
+    """
+    Cached implementation of ImageParser.parse
+
+    Results are shared between callers, so they are returned as read-only
+    mappings. Keys are plain strings, so lookups hash in O(len(image_name)).
+    """
+    # Handle digest format (image@sha256:...)
+    at = image_name.rfind('@')
+    if at != -1 and image_name.startswith('sha256:', at + 1):
+        digest = image_name[at + 1:]
+        name_part = image_name[:at]
+    else:
         digest = None
-        if '@sha256:' in image_name:
-            image_name, digest = image_name.split('@sha256:')
-            digest = f'sha256:{digest}'
+        name_part = image_name
 
-        # Split tag from image name
+    # Split tag from image name, ignoring any registry port before the first slash
+    slash = name_part.find('/')
+    colon = name_part.rfind(':', slash + 1)
+    if colon != -1:
+        tag = name_part[colon + 1:]
+        name_part = name_part[:colon]
+    else:
         tag = 'latest'
-        if ':' in image_name:
-            image_name, tag = image_name.rsplit(':', 1)
-
-        # Parse registry and repository
-        parts = image_name.split('/')
 
-        if len(parts) == 1:
-            # Simple name like "nginx"
-            registry = 'docker.io'
-            repository = f'library/{parts[0]}'
-        elif len(parts) == 2:
-            # Could be "user/repo" or "registry/repo"
-            if '.' in parts[0] or ':' in parts[0]:
-                # Has registry (contains . or port)
-                registry = parts[0]
-                repository = parts[1]
-            else:
-                # Docker Hub user repository
-                registry = 'docker.io'
-                repository = f'{parts[0]}/{parts[1]}'
-        else:
-            # Full path with registry
-            registry = parts[0]
-            repository = '/'.join(parts[1:])
+    # Parse registry and repository
+    if slash == -1:
+        # Simple name like "nginx"
+        registry = 'docker.io'
+        repository = f'library/{name_part}'
+    elif (name_part.find('/', slash + 1) != -1 or
+          name_part.find('.', 0, slash) != -1 or
+          name_part.find(':', 0, slash) != -1):
+        # Full path, or first component is a registry (contains . or port)
+        registry = name_part[:slash]
+        repository = name_part[slash + 1:]
+    else:
+        # Docker Hub user repository
+        registry = 'docker.io'
+        repository = name_part
 
-        # Construct full name
-        full_name = f'{registry}/{repository}:{tag}'
-        if digest:
-            full_name = f'{registry}/{repository}@{digest}'
+    # Construct full name
+    if digest:
+        full_name = ''.join((registry, '/', repository, '@', digest))
+    else:
+        full_name = ''.join((registry, '/', repository, ':', tag))
 
-        return {
-            'registry': registry,
-            'repository': repository,
-            'tag': tag,
-            'digest': digest,
-            'full_name': full_name,
-            'original': image_name if not digest else f'{image_name}@{digest}'
-        }
+    return MappingProxyType({
+        'registry': registry,
+        'repository': repository,
+        'tag': tag,
+        'digest': digest,
+        'full_name': full_name,
+        'original': image_name
+    })
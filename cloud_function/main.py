@@ -6,15 +6,63 @@ import os
 import json
 import logging
 import base64
-from datetime import datetime
+import concurrent.futures
+from datetime import datetime, timezone
+from types import MappingProxyType
+from typing import Optional
+from google.cloud import pubsub_v1
 from qualys_scanner_cloudrun import QScannerCloudRun
 from image_parser import ImageParser
 from storage_handler import StorageHandler
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Audit log methods that trigger a scan
+_CLOUDRUN_METHODS = frozenset({
+    'google.cloud.run.v2.Services.CreateService',
+    'google.cloud.run.v2.Services.UpdateService',
+})
+_CLOUDRUN_METHOD_BYTES = tuple(method.encode('utf-8') for method in _CLOUDRUN_METHODS)
+
+# Shared read-only default for missing audit log fields
+_EMPTY = MappingProxyType({})
+
+# Alert threshold, resolved once per instance into a predicate over vulnerability counts
+_NOTIFY_THRESHOLD = os.environ.get('NOTIFY_SEVERITY_THRESHOLD', 'HIGH').upper()
+_ALERT_PREDICATE = {
+    'CRITICAL': lambda vulns: vulns.get('CRITICAL', 0) > 0,
+    'HIGH': lambda vulns: vulns.get('CRITICAL', 0) > 0 or vulns.get('HIGH', 0) > 0
+}.get(_NOTIFY_THRESHOLD, lambda vulns: False)
+
+# Alert publisher, created on first use and reused across invocations
+_publisher = None
+_ALERT_PUBLISH_TIMEOUT = 30
+
+# Maximum number of images scanned concurrently per event
+_MAX_SCAN_WORKERS = 8
+
+
+def _get_publisher() -> pubsub_v1.PublisherClient:
+    """Return the shared Pub/Sub publisher, batching alerts across the image loop"""
+    global _publisher
+    if _publisher is None:
+        _publisher = pubsub_v1.PublisherClient(
+            batch_settings=pubsub_v1.types.BatchSettings(
+                max_messages=100,
+                max_bytes=1 << 20,
+                max_latency=0.1
+            )
+        )
+    return _publisher
+
 
 def process_cloudrun_event(event, context):
     """
@@ -24,44 +72,65 @@ def process_cloudrun_event(event, context):
         event: Pub/Sub message event
         context: Cloud Function context
     """
-    logger.info(f'Processing Cloud Run event: {context.event_id}')
+    logger.info('Processing Cloud Run event: %s', context.event_id)
 
     try:
+        # Reject events by attribute before decoding, when the publisher sets one
+        attribute_method = (event.get('attributes') or {}).get('methodName')
+        if attribute_method and attribute_method not in _CLOUDRUN_METHODS:
+            logger.info('Ignoring non-Cloud Run service event: %s', attribute_method)
+            return
+
         # Decode Pub/Sub message
         if 'data' in event:
-            message_data = base64.b64decode(event['data']).decode('utf-8')
-            audit_log = json.loads(message_data)
+            raw_data = base64.b64decode(event['data'])
         else:
             logger.warning('No data in Pub/Sub message')
             return
 
+        # Cheap substring check so unrelated audit logs skip JSON parsing
+        if not any(method in raw_data for method in _CLOUDRUN_METHOD_BYTES):
+            logger.info('Ignoring non-Cloud Run service event')
+            return
+
+        audit_log = _loads(raw_data)
+
         # Extract event details from Cloud Audit Log
-        logger.info(f'Audit log method: {audit_log.get("protoPayload", {}).get("methodName")}')
+        proto = audit_log.get('protoPayload') or _EMPTY
+        method_name = proto.get('methodName', '')
+        logger.info('Audit log method: %s', method_name)
 
         # Check if this is a Cloud Run service update/create
-        method_name = audit_log.get('protoPayload', {}).get('methodName', '')
-        if not ('google.cloud.run.v2.Services.CreateService' in method_name or
-                'google.cloud.run.v2.Services.UpdateService' in method_name):
-            logger.info(f'Ignoring non-Cloud Run service event: {method_name}')
+        if method_name not in _CLOUDRUN_METHODS:
+            logger.info('Ignoring non-Cloud Run service event: %s', method_name)
             return
 
-        # Extract service details
-        resource = audit_log.get('resource', {})
-        project_id = resource.get('labels', {}).get('project_id')
-        service_name = resource.get('labels', {}).get('service_name')
-        location = resource.get('labels', {}).get('location')
-
-        logger.info(f'Cloud Run service: {service_name} in {location}')
+        # One timestamp is shared by every record written for this event
+        now_iso = datetime.now(timezone.utc).isoformat()
 
-        # Extract container images from the request
-        request = audit_log.get('protoPayload', {}).get('request', {})
-        images = extract_images_from_service(request)
+        # Extract service details
+        labels = (audit_log.get('resource') or _EMPTY).get('labels') or _EMPTY
+        project_id = labels.get('project_id')
+        service_name = labels.get('service_name')
+        location = labels.get('location')
+
+        logger.info('Cloud Run service: %s in %s', service_name, location)
+
+        # Extract container images from the request (Cloud Run v2 API structure).
+        # Sidecars can reuse an image, possibly spelled differently (nginx vs
+        # docker.io/library/nginx:latest); scan each normalized image once
+        template = (proto.get('request') or _EMPTY).get('template') or _EMPTY
+        images = list({
+            ImageParser.parse(container['image'])['full_name']: container['image']
+            for container in template.get('containers') or ()
+            if container.get('image')
+        }.values())
 
         if not images:
             logger.warning('No container images found in service definition')
             return
 
-        logger.info(f'Found {len(images)} container images to scan')
+        logger.info('Found %s container images to scan', len(images))
 
         # Initialize scanner and storage
         scanner = QScannerCloudRun(project_id=project_id)
@@ -71,102 +140,117 @@ def process_cloudrun_event(event, context):
             bucket_name=os.environ['SCAN_RESULTS_BUCKET']
         )
 
-        # Process each image
-        results = []
-        for image in images:
-            logger.info(f'Processing image: {image}')
-
-            try:
-                image_info = ImageParser.parse(image)
-
-                # Check if recently scanned
-                if storage.is_recently_scanned(image_info['full_name']):
-                    logger.info(f'Image {image} was recently scanned, skipping')
-                    continue
-
-                # Custom tags for tracking
-                custom_tags = {
-                    'container_type': 'cloudrun',
-                    'gcp_project': project_id,
-                    'service_name': service_name,
-                    'location': location,
-                    'event_id': context.event_id
-                }
-
-                # Scan the image
-                scan_result = scanner.scan_image(
-                    registry=image_info['registry'],
-                    repository=image_info['repository'],
-                    tag=image_info['tag'],
-                    digest=image_info.get('digest'),
-                    custom_tags=custom_tags
-                )
-
-                # Prepare result record
-                result_record = {
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'container_type': 'cloudrun',
-                    'image': image,
-                    'project_id': project_id,
-                    'service_name': service_name,
-                    'location': location,
-                    'scan_id': scan_result.get('scan_id'),
-                    'status': scan_result.get('status'),
-                    'vulnerabilities': scan_result.get('vulnerabilities', {}),
-                    'compliance': scan_result.get('compliance', {})
-                }
-
-                # Save results
-                storage.save_scan_result(result_record)
-                results.append(result_record)
-
-                # Check if alert needed
-                if should_alert(result_record):
-                    send_alert(result_record)
-
-            except Exception as img_error:
-                logger.error(f'Error processing image {image}: {str(img_error)}')
-                storage.save_error({
-                    'timestamp': datetime.utcnow().isoformat(),
-                    'image': image,
-                    'error': str(img_error),
-                    'service_name': service_name,
-                    'project_id': project_id
-                })
-
-        logger.info(f'Successfully processed {len(results)} images')
+        # Scan images concurrently; each scan is dominated by blocking API calls
+        pending_results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(_MAX_SCAN_WORKERS, len(images))) as executor:
+            futures = [
+                executor.submit(_process_one, image, scanner, storage, project_id,
+                                service_name, location, context.event_id, now_iso)
+                for image in images
+            ]
+            for future in concurrent.futures.as_completed(futures):
+                result_record = future.result()
+                if result_record:
+                    pending_results.append(result_record)
+
+        pending_alerts = [record for record in pending_results if should_alert(record)]
+
+        # Save results in one parallel batch
+        failed = storage.save_scan_results(pending_results)
+        for result_record, save_error in failed:
+            logger.error('Error saving scan result for %s: %s', result_record['image'], save_error)
+            storage.save_error({
+                'timestamp': now_iso,
+                'image': result_record['image'],
+                'error': str(save_error),
+                'error_type': type(save_error).__name__,
+                'service_name': service_name,
+                'project_id': project_id
+            })
+
+        if pending_alerts:
+            send_alerts(pending_alerts)
+
+        logger.info('Successfully processed %s images', len(pending_results) - len(failed))
 
     except Exception as e:
-        logger.error(f'Error processing event: {str(e)}')
+        logger.error('Error processing event: %s', e)
         raise
 
 
-def extract_images_from_service(service_request: dict) -> list:
+def _process_one(image: str, scanner: QScannerCloudRun, storage: StorageHandler,
+                 project_id: str, service_name: str, location: str,
+                 event_id: str, timestamp: str) -> Optional[dict]:
     """
-    Extract container images from Cloud Run service request
+    Scan a single container image
 
     Args:
-        service_request: Service request from audit log
+        image: Container image name
+        scanner: Shared qscanner client
+        storage: Shared storage handler
+        project_id: Project of the Cloud Run service
+        service_name: Cloud Run service name
+        location: Cloud Run service location
+        event_id: Pub/Sub event ID for tracking
+        timestamp: ISO timestamp for the records
 
     Returns:
-        List of container image names
+        Result record, or None if the image was skipped or failed
     """
-    images = []
+    logger.info('Processing image: %s', image)
 
     try:
-        # Cloud Run v2 API structure
-        template = service_request.get('template', {})
-        containers = template.get('containers', [])
-
-        for container in containers:
-            image = container.get('image')
-            if image:
-                images.append(image)
-
-    except Exception as e:
-        logger.error(f'Error extracting images: {str(e)}')
+        image_info = ImageParser.parse(image)
+
+        # Check if recently scanned
+        if storage.is_recently_scanned(image_info['full_name']):
+            logger.info('Image %s was recently scanned, skipping', image)
+            return None
+
+        # Custom tags for tracking
+        custom_tags = {
+            'container_type': 'cloudrun',
+            'gcp_project': project_id,
+            'service_name': service_name,
+            'location': location,
+            'event_id': event_id
+        }
+
+        # Scan the image
+        scan_result = scanner.scan_image(
+            registry=image_info['registry'],
+            repository=image_info['repository'],
+            tag=image_info['tag'],
+            digest=image_info.get('digest'),
+            custom_tags=custom_tags,
+            image_id=image_info['full_name']
+        )
 
-    return images
+        # Prepare result record
+        return {
+            'timestamp': timestamp,
+            'container_type': 'cloudrun',
+            'image': image,
+            'project_id': project_id,
+            'service_name': service_name,
+            'location': location,
+            'scan_id': scan_result.get('scan_id'),
+            'status': scan_result.get('status'),
+            'vulnerabilities': scan_result.get('vulnerabilities', {}),
+            'compliance': scan_result.get('compliance', {})
+        }
+
+    except Exception as img_error:
+        logger.error('Error processing image %s: %s', image, img_error)
+        storage.save_error({
+            'timestamp': timestamp,
+            'image': image,
+            'error': str(img_error),
+            'error_type': type(img_error).__name__,
+            'service_name': service_name,
+            'project_id': project_id
+        })
+        return None
 
 
 def should_alert(scan_result: dict) -> bool:
@@ -179,18 +263,27 @@ def should_alert(scan_result: dict) -> bool:
     Returns:
         True if alert should be sent
     """
-    notify_threshold = os.environ.get('NOTIFY_SEVERITY_THRESHOLD', 'HIGH')
+    return _ALERT_PREDICATE(scan_result.get('vulnerabilities') or _EMPTY)
 
-    vulnerabilities = scan_result.get('vulnerabilities', {})
-    critical_count = vulnerabilities.get('CRITICAL', 0)
-    high_count = vulnerabilities.get('HIGH', 0)
 
-    if notify_threshold == 'CRITICAL':
-        return critical_count > 0
-    elif notify_threshold == 'HIGH':
-        return critical_count > 0 or high_count > 0
+def send_alerts(scan_results: list):
+    """
+    Send alerts for a batch of scan results
 
-    return False
+    Args:
+        scan_results: Scan result dictionaries that need an alert
+    """
+    futures = [future for future in map(send_alert, scan_results) if future is not None]
+    if not futures:
+        return
+
+    # Wait for the batched publishes so they are not lost when the function returns
+    done, not_done = concurrent.futures.wait(futures, timeout=_ALERT_PUBLISH_TIMEOUT)
+    for future in done:
+        if future.exception() is not None:
+            logger.error('Error publishing alert: %s', future.exception())
+    if not_done:
+        logger.error('%s alerts were not published within %ss', len(not_done), _ALERT_PUBLISH_TIMEOUT)
 
 
 def send_alert(scan_result: dict):
@@ -199,21 +292,20 @@ def send_alert(scan_result: dict):
 
     Args:
         scan_result: Scan result dictionary
+
+    Returns:
+        Publish future, or None if no message was published
     """
     try:
         # You can integrate with Cloud Pub/Sub, Cloud Monitoring, or email services
         logger.warning(
-            f'SECURITY ALERT: High severity vulnerabilities found in {scan_result["image"]}. '
-            f'Service: {scan_result.get("service_name")} '
-            f'Vulnerabilities: {scan_result["vulnerabilities"]}'
+            'SECURITY ALERT: High severity vulnerabilities found in %s. Service: %s Vulnerabilities: %s',
+            scan_result['image'], scan_result.get('service_name'), scan_result['vulnerabilities']
         )
 
         # Example: Publish to Pub/Sub topic for alerts
         notification_topic = os.environ.get('NOTIFICATION_TOPIC')
         if notification_topic:
-            from google.cloud import pubsub_v1
-
-            publisher = pubsub_v1.PublisherClient()
             message_data = json.dumps({
                 'severity': 'HIGH',
                 'image': scan_result['image'],
@@ -222,8 +314,11 @@ def send_alert(scan_result: dict):
                 'timestamp': scan_result['timestamp']
             }).encode('utf-8')
 
-            publisher.publish(notification_topic, message_data)
-            logger.info(f'Alert published to {notification_topic}')
+            future = _get_publisher().publish(notification_topic, message_data)
+            logger.info('Alert queued for %s', notification_topic)
+            return future
 
     except Exception as e:
-        logger.error(f'Error sending alert: {str(e)}')
+        logger.error('Error sending alert: %s', e)
+
+    return None
@@ -2,15 +2,90 @@
 Qualys qscanner integration using Google Cloud Run Jobs
 Runs qscanner in a container on-demand for each scan
 """
+import io
 import os
 import json
+import string
+import functools
 import logging
 import time
-from typing import Dict, Optional
-from datetime import datetime
+import uuid
+from typing import Dict, Iterator, Optional
+from datetime import datetime, timezone
 from google.cloud import run_v2
+from google.cloud import logging as cloud_logging
 from google.api_core import exceptions
 
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+
+# qscanner reports larger than this are streamed rather than fully loaded
+_STREAM_THRESHOLD = 1024 * 1024
+_STREAM_ERRORS = (ijson.JSONError,) if ijson is not None else ()
+# Report lists summarized from streamed reports: ijson prefix -> list name
+_STREAM_LISTS = {
+    'vulnerabilities': 'vulnerabilities',
+    'compliance': 'compliance',
+    'results.vulnerabilities': 'vulnerabilities',
+    'results.compliance': 'compliance',
+}
+# Holds the summaries of a streamed report in place of its parsed lists
+_SUMMARY_KEY = '__summaries__'
+
+# Numeric and canonical severities, resolved with a single lookup
+_SEV_MAP = {
+    '5': 'CRITICAL',
+    '4': 'HIGH',
+    '3': 'MEDIUM',
+    '2': 'LOW',
+    '1': 'INFORMATIONAL',
+    'CRITICAL': 'CRITICAL',
+    'HIGH': 'HIGH',
+    'MEDIUM': 'MEDIUM',
+    'LOW': 'LOW',
+    'INFORMATIONAL': 'INFORMATIONAL',
+    'INFO': 'INFORMATIONAL'
+}
+# JSON reports usually carry numeric severities as integers
+_SEV_MAP.update({int(key): value for key, value in _SEV_MAP.items() if key.isdigit()})
+
+# Cloud Run job names allow only lowercase letters, digits and hyphens
+_JOB_NAME_ALLOWED = frozenset(string.ascii_lowercase + string.digits + '-')
+_JOB_NAME_TABLE = str.maketrans({chr(c): '-' for c in range(256) if chr(c) not in _JOB_NAME_ALLOWED})
+
+# API errors worth retrying while polling an execution
+_RETRYABLE_POLL_ERRORS = (
+    exceptions.ServiceUnavailable,
+    exceptions.TooManyRequests,
+    exceptions.InternalServerError,
+    exceptions.DeadlineExceeded
+)
+
+
+# API clients are cached so warm function instances reuse their channels
+@functools.lru_cache(maxsize=None)
+def _jobs_client() -> run_v2.JobsClient:
+    return run_v2.JobsClient()
+
+
+@functools.lru_cache(maxsize=None)
+def _executions_client() -> run_v2.ExecutionsClient:
+    return run_v2.ExecutionsClient()
+
+
+@functools.lru_cache(maxsize=None)
+def _logging_client(project_id: str) -> cloud_logging.Client:
+    return cloud_logging.Client(project=project_id)
+
 
 class QScannerCloudRun:
     """
@@ -30,8 +105,8 @@ class QScannerCloudRun:
         self.project_id = project_id or os.environ['GCP_PROJECT_ID']
         self.region = os.environ.get('GCP_REGION', 'us-central1')
 
-        self.client = run_v2.JobsClient()
-        self.executions_client = run_v2.ExecutionsClient()
+        self.client = _jobs_client()
+        self.executions_client = _executions_client()
 
         # qscanner configuration
         self.qscanner_image = os.environ.get('QSCANNER_IMAGE', 'qualys/qscanner:latest')
@@ -42,8 +117,34 @@ class QScannerCloudRun:
         # Service account for Cloud Run Jobs
         self.service_account = os.environ.get('CLOUDRUN_SERVICE_ACCOUNT')
 
+        # Execution template shared by every scan; only the qscanner arguments vary
+        self._job_template = run_v2.ExecutionTemplate(
+            template=run_v2.TaskTemplate(
+                containers=[
+                    run_v2.Container(
+                        image=self.qscanner_image,
+                        # Exec qscanner directly; no shell re-parses the arguments
+                        command=['qscanner'],
+                        env=[
+                            run_v2.EnvVar(name='QUALYS_ACCESS_TOKEN', value=self.qualys_access_token),
+                        ],
+                        resources=run_v2.ResourceRequirements(
+                            limits={
+                                'cpu': '1',
+                                'memory': '2Gi'
+                            }
+                        )
+                    )
+                ],
+                max_retries=0,  # Don't retry failed scans
+                timeout='1800s',
+                service_account=self.service_account
+            )
+        )
+
     def scan_image(self, registry: str, repository: str, tag: str = 'latest',
-                   digest: Optional[str] = None, custom_tags: Optional[Dict] = None) -> Dict:
+                   digest: Optional[str] = None, custom_tags: Optional[Dict] = None,
+                   image_id: Optional[str] = None) -> Dict:
         """
         Scan a container image by creating a Cloud Run Job
 
@@ -53,19 +154,24 @@ class QScannerCloudRun:
             tag: Image tag
             digest: Optional image digest
             custom_tags: Optional custom tags for tracking
+            image_id: Optional precomputed image identifier (ImageParser full_name)
 
         Returns:
             Dictionary containing scan results
         """
         # Construct image identifier
-        image_id = f'{registry}/{repository}:{tag}'
-        if digest:
-            image_id = f'{registry}/{repository}@{digest}'
+        if image_id is None:
+            image_id = f'{registry}/{repository}@{digest}' if digest else f'{registry}/{repository}:{tag}'
 
-        logging.info(f'Scanning image with qscanner Cloud Run: {image_id}')
+        logging.info('Scanning image with qscanner Cloud Run: %s', image_id)
+
+        now = datetime.now(timezone.utc)
+        # Unique per scan: different references to one image (tag aliases, digests,
+        # mirrored registries) share a repository and tag, and may scan in the same second
+        run_id = f"{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
 
         # Generate unique job name
-        job_name = self._generate_job_name(registry, repository, tag)
+        job_name = self._generate_job_name(registry, repository, tag, suffix=run_id)
 
         try:
             # Create and run qscanner job
@@ -75,7 +181,7 @@ class QScannerCloudRun:
             scan_results = self._parse_qscanner_output(scan_output)
 
             return {
-                'scan_id': scan_results.get('scanId', datetime.utcnow().strftime('%Y%m%d%H%M%S')),
+                'scan_id': scan_results.get('scanId', run_id),
                 'status': 'COMPLETED',
                 'image': image_id,
                 'vulnerabilities': self._parse_vulnerabilities(scan_results),
@@ -85,7 +191,7 @@ class QScannerCloudRun:
                     'repository': repository,
                     'tag': tag,
                     'digest': digest,
-                    'scan_timestamp': datetime.utcnow().isoformat(),
+                    'scan_timestamp': now.isoformat(),
                     'scanner': 'qscanner-cloudrun',
                     'job_name': job_name,
                     'raw_output': scan_results
@@ -93,14 +199,14 @@ class QScannerCloudRun:
             }
 
         except Exception as e:
-            logging.error(f'Error scanning image {image_id}: {str(e)}')
+            logging.error('Error scanning image %s: %s', image_id, e)
             raise
         finally:
             # Clean up: delete the job
             try:
                 self._delete_job(job_name)
             except Exception as e:
-                logging.warning(f'Failed to delete job {job_name}: {str(e)}')
+                logging.warning('Failed to delete job %s: %s', job_name, e)
 
     def _run_qscanner_job(self, image_id: str, job_name: str,
                          custom_tags: Optional[Dict] = None) -> str:
@@ -115,37 +221,14 @@ class QScannerCloudRun:
         Returns:
             Job logs (scan output)
         """
-        logging.info(f'Creating Cloud Run Job: {job_name}')
+        logging.info('Creating Cloud Run Job: %s', job_name)
 
-        # Build qscanner command
-        command = self._build_qscanner_command(image_id, custom_tags)
+        # Build qscanner arguments
+        args = self._build_qscanner_command(image_id, custom_tags)
 
-        # Environment variables for qscanner
-        env_vars = [
-            run_v2.EnvVar(name='QUALYS_ACCESS_TOKEN', value=self.qualys_access_token),
-        ]
-
-        # Container configuration
-        container = run_v2.Container(
-            image=self.qscanner_image,
-            command=['/bin/sh', '-c'],
-            args=[' '.join(command)],
-            env=env_vars,
-            resources=run_v2.ResourceRequirements(
-                limits={
-                    'cpu': '1',
-                    'memory': '2Gi'
-                }
-            )
-        )
-
-        # Job template
-        template = run_v2.TaskTemplate(
-            containers=[container],
-            max_retries=0,  # Don't retry failed scans
-            timeout='1800s',
-            service_account=self.service_account
-        )
+        # Copy the prebuilt template and fill in this scan's arguments
+        template = run_v2.ExecutionTemplate(self._job_template)
+        template.template.containers[0].args = args
 
         # Job configuration
         job = run_v2.Job(
@@ -166,10 +249,10 @@ class QScannerCloudRun:
                 job_id=job_name
             )
             created_job = operation.result()
-            logging.info(f'Job {job_name} created')
+            logging.info('Job %s created', job_name)
 
         except exceptions.GoogleAPIError as e:
-            logging.error(f'Failed to create job: {str(e)}')
+            logging.error('Failed to create job: %s', e)
             raise
 
         # Execute the job
@@ -177,10 +260,10 @@ class QScannerCloudRun:
             execution_request = run_v2.RunJobRequest(name=created_job.name)
             execution_operation = self.client.run_job(request=execution_request)
             execution = execution_operation.result()
-            logging.info(f'Job execution started: {execution.name}')
+            logging.info('Job execution started: %s', execution.name)
 
         except exceptions.GoogleAPIError as e:
-            logging.error(f'Failed to execute job: {str(e)}')
+            logging.error('Failed to execute job: %s', e)
             raise
 
         # Wait for execution to complete
@@ -191,16 +274,23 @@ class QScannerCloudRun:
 
         return logs
 
-    def _wait_for_execution_completion(self, execution_name: str, poll_interval: int = 10):
+    def _wait_for_execution_completion(self, execution_name: str, initial_interval: float = 2.0,
+                                       max_interval: float = 30.0):
         """
         Wait for job execution to complete
 
+        Polls with exponential backoff so short scans return quickly while
+        long scans make fewer status calls.
+
         Args:
             execution_name: Job execution name
-            poll_interval: Seconds between status checks
+            initial_interval: Seconds before the second status check
+            max_interval: Maximum seconds between status checks
         """
         start_time = time.time()
-        logging.info(f'Waiting for execution {execution_name} to complete...')
+        interval = initial_interval
+        executions_client = self.executions_client
+        logging.info('Waiting for execution %s to complete...', execution_name)
 
         while True:
             elapsed = time.time() - start_time
@@ -208,29 +298,35 @@ class QScannerCloudRun:
                 raise TimeoutError(f'Execution {execution_name} timed out after {self.scan_timeout} seconds')
 
             try:
-                execution = self.executions_client.get_execution(name=execution_name)
+                execution = executions_client.get_execution(name=execution_name)
+
+            except _RETRYABLE_POLL_ERRORS as e:
+                logging.warning('Transient error checking execution status: %s', e)
+
+            except exceptions.GoogleAPIError as e:
+                # Permanent errors (auth, not found, ...) won't resolve by waiting
+                logging.error('Error checking execution status: %s', e)
+                raise
 
+            else:
                 # Check completion status
                 if execution.completion_time:
-                    logging.info(f'Execution completed')
+                    logging.info('Execution completed')
 
                     # Check if succeeded (exit code 0 or 1 for qscanner with findings)
                     if execution.succeeded_count > 0:
-                        logging.info(f'Execution succeeded')
+                        logging.info('Execution succeeded')
                         return
                     elif execution.failed_count > 0:
                         # Check task details for exit code
                         # qscanner may exit with code 1 when vulnerabilities are found
-                        logging.warning(f'Execution had failures, checking exit codes')
+                        logging.warning('Execution had failures, checking exit codes')
                         return
                     else:
                         raise Exception(f'Execution did not succeed')
 
-                time.sleep(poll_interval)
-
-            except exceptions.GoogleAPIError as e:
-                logging.error(f'Error checking execution status: {str(e)}')
-                time.sleep(poll_interval)
+            time.sleep(interval)
+            interval = min(interval * 2, max_interval)
 
     def _get_execution_logs(self, execution_name: str) -> str:
         """
@@ -243,9 +339,7 @@ class QScannerCloudRun:
             Execution logs
         """
         try:
-            from google.cloud import logging as cloud_logging
-
-            logging_client = cloud_logging.Client(project=self.project_id)
+            logging_client = _logging_client(self.project_id)
 
             # Extract execution ID from name
             execution_id = execution_name.split('/')[-1]
@@ -253,15 +347,22 @@ class QScannerCloudRun:
             # Query logs
             filter_str = f'resource.type="cloud_run_job" AND labels."run.googleapis.com/execution_name"="{execution_id}"'
 
-            logs = []
-            for entry in logging_client.list_entries(filter_=filter_str, max_results=1000):
-                if hasattr(entry, 'payload'):
-                    logs.append(str(entry.payload))
+            buf = io.StringIO()
+            for entry in logging_client.list_entries(
+                resource_names=[f'projects/{self.project_id}'],
+                filter_=filter_str,
+                max_results=1000,
+                page_size=1000
+            ):
+                payload = getattr(entry, 'payload', None)
+                if payload is not None:
+                    buf.write(str(payload))
+                    buf.write('\n')
 
-            return '\n'.join(logs)
+            return buf.getvalue()
 
         except Exception as e:
-            logging.error(f'Failed to retrieve execution logs: {str(e)}')
+            logging.error('Failed to retrieve execution logs: %s', e)
             return ''
 
     def _delete_job(self, job_name: str):
@@ -272,16 +373,17 @@ class QScannerCloudRun:
             job_name: Job name
         """
         try:
-            logging.info(f'Deleting Cloud Run Job: {job_name}')
+            logging.info('Deleting Cloud Run Job: %s', job_name)
             name = f'projects/{self.project_id}/locations/{self.region}/jobs/{job_name}'
             operation = self.client.delete_job(name=name)
             operation.result()
-            logging.info(f'Job {job_name} deleted')
+            logging.info('Job %s deleted', job_name)
 
         except exceptions.GoogleAPIError as e:
-            logging.warning(f'Failed to delete job: {str(e)}')
+            logging.warning('Failed to delete job: %s', e)
 
-    def _generate_job_name(self, registry: str, repository: str, tag: str) -> str:
+    def _generate_job_name(self, registry: str, repository: str, tag: str,
+                           suffix: Optional[str] = None) -> str:
         """
         Generate a unique job name
 
@@ -289,70 +391,151 @@ class QScannerCloudRun:
             registry: Container registry
             repository: Image repository
             tag: Image tag
+            suffix: Optional precomputed unique suffix (lowercase alphanumeric and hyphens)
 
         Returns:
             Sanitized job name
         """
         # Cloud Run job names must be lowercase alphanumeric with hyphens
-        timestamp = datetime.utcnow().strftime('%Y%m%d%H%M%S')
-        base_name = f'qscanner-{repository.replace("/", "-")}-{tag}'.lower()
+        if suffix is None:
+            suffix = f"{datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        # Replace '/' and any other invalid characters in a single pass
+        base_name = f'qscanner-{repository}-{tag}'.lower().translate(_JOB_NAME_TABLE)
 
-        # Remove invalid characters
-        base_name = ''.join(c if c.isalnum() or c == '-' else '-' for c in base_name)
-
-        # Limit length (max 63 characters)
-        max_length = 50  # Leave room for timestamp
+        # Limit length (max 63 characters), leaving room for the suffix
+        max_length = 62 - len(suffix)
         if len(base_name) > max_length:
             base_name = base_name[:max_length]
 
-        return f'{base_name}-{timestamp}'
+        return f'{base_name}-{suffix}'
 
     def _build_qscanner_command(self, image_id: str, custom_tags: Optional[Dict] = None) -> list:
         """
-        Build qscanner command for container
+        Build qscanner arguments for container
 
         Args:
             image_id: Full image identifier
             custom_tags: Optional tags for tracking
 
         Returns:
-            Command as list
+            Arguments for the qscanner binary as list
         """
-        cmd_parts = [
-            'qscanner',
+        tag_args = [arg for key, value in (custom_tags or {}).items() for arg in ('--tag', f'{key}={value}')]
+
+        return [
             'image',
             image_id,
             '--pod', self.qualys_pod,
             '--skip-verify-tls',
-            '--output-format', 'json'
+            '--output-format', 'json',
+            *tag_args
         ]
 
-        # Add custom tags
-        if custom_tags:
-            for key, value in custom_tags.items():
-                cmd_parts.extend(['--tag', f'{key}={value}'])
-
-        return cmd_parts
-
     def _parse_qscanner_output(self, output: str) -> Dict:
-        """Parse qscanner JSON output"""
+        """
+        Parse qscanner JSON output
+
+        Large reports are not loaded into memory at once. They are summarized
+        in a single streaming pass by _stream_qscanner_output.
+        """
         try:
+            if ijson is not None and len(output) > _STREAM_THRESHOLD:
+                data = self._stream_qscanner_output(output)
+                logging.info('Streamed large qscanner JSON output')
+                return data
+
             # qscanner outputs JSON
-            data = json.loads(output)
+            data = _loads(output)
             logging.info('Successfully parsed qscanner JSON output')
             return data
-        except json.JSONDecodeError as e:
-            logging.error(f'Failed to parse qscanner output as JSON: {str(e)}')
-            logging.debug(f'Output was: {output[:500]}...')
+        except (json.JSONDecodeError, *_STREAM_ERRORS) as e:
+            logging.error('Failed to parse qscanner output as JSON: %s', e)
             return {
                 'status': 'PARSE_ERROR',
                 'raw_output': output,
                 'error': str(e)
             }
 
-    def _parse_vulnerabilities(self, scan_results: Dict) -> Dict:
-        """Parse vulnerability information from qscanner results"""
-        vuln_summary = {
+    def _stream_qscanner_output(self, output: str) -> Dict:
+        """
+        Summarize a large qscanner report in one incremental pass
+
+        Each vulnerability and compliance item is built, folded into its
+        summary and dropped, so only the summaries are held in memory. As for
+        loaded reports, top-level lists take precedence over those under
+        'results'.
+
+        Args:
+            output: Raw qscanner JSON output
+
+        Returns:
+            Dictionary with the scan ID and the summaries under _SUMMARY_KEY
+        """
+        adders = {'vulnerabilities': (self._new_vuln_summary, self._add_vulnerability),
+                  'compliance': (self._new_compliance, self._add_compliance_check)}
+        summaries: Dict[str, Dict] = {}
+        # Item prefix -> (fold function, summary) for lists seen so far
+        folds = {}
+        data: Dict = {}
+        builder = fold = summary = None
+        depth = 0
+
+        for prefix, event, value in ijson.parse(output, use_float=True):
+            # Inside a list item: feed the builder until the item closes
+            if builder is not None:
+                builder.event(event, value)
+                if event in ('start_map', 'start_array'):
+                    depth += 1
+                elif event in ('end_map', 'end_array'):
+                    depth -= 1
+                    if not depth:
+                        fold(summary, builder.value)
+                        builder = None
+                continue
+
+            if prefix in folds:
+                fold, summary = folds[prefix]
+                if event in ('start_map', 'start_array'):
+                    builder = ijson.ObjectBuilder()
+                    builder.event(event, value)
+                    depth = 1
+                else:
+                    fold(summary, value)
+            elif event == 'start_array' and prefix in _STREAM_LISTS:
+                new, add = adders[_STREAM_LISTS[prefix]]
+                summaries[prefix] = new()
+                folds[f'{prefix}.item'] = (add, summaries[prefix])
+            elif prefix == 'scanId' and event in ('string', 'number'):
+                data['scanId'] = value
+
+        data[_SUMMARY_KEY] = {
+            key: summaries.get(key) or summaries.get(f'results.{key}') or new()
+            for key, (new, _) in adders.items()
+        }
+        return data
+
+    @staticmethod
+    def _iter_report_items(scan_results: Dict, key: str) -> Iterator[Dict]:
+        """
+        Iterate a list from qscanner results, at the top level or under 'results'
+
+        Args:
+            scan_results: Parsed qscanner results
+            key: List name, e.g. 'vulnerabilities'
+
+        Returns:
+            Iterator over the list items
+        """
+        if key in scan_results:
+            return iter(scan_results[key])
+        elif 'results' in scan_results and key in scan_results['results']:
+            return iter(scan_results['results'][key])
+        return iter(())
+
+    @staticmethod
+    def _new_vuln_summary() -> Dict:
+        """Return an empty vulnerability summary"""
+        return {
             'CRITICAL': 0,
             'HIGH': 0,
             'MEDIUM': 0,
@@ -362,81 +545,111 @@ class QScannerCloudRun:
             'details': []
         }
 
-        # Extract vulnerabilities from qscanner output
-        vulnerabilities = []
-        if 'vulnerabilities' in scan_results:
-            vulnerabilities = scan_results['vulnerabilities']
-        elif 'results' in scan_results and 'vulnerabilities' in scan_results['results']:
-            vulnerabilities = scan_results['results']['vulnerabilities']
-
-        for vuln in vulnerabilities:
-            severity = self._normalize_severity(vuln.get('severity', 'UNKNOWN'))
-            if severity in vuln_summary:
-                vuln_summary[severity] += 1
-            vuln_summary['total'] += 1
-
-            vuln_summary['details'].append({
-                'qid': vuln.get('qid') or vuln.get('id'),
-                'cve': vuln.get('cve') or vuln.get('cveId'),
-                'severity': severity,
-                'title': vuln.get('title') or vuln.get('name'),
-                'package': vuln.get('package', {}).get('name') if isinstance(vuln.get('package'), dict) else vuln.get('packageName'),
-                'version': vuln.get('package', {}).get('version') if isinstance(vuln.get('package'), dict) else vuln.get('packageVersion'),
-                'fixed_version': vuln.get('fixedVersion') or vuln.get('fix')
-            })
-
-        logging.info(f'Parsed {vuln_summary["total"]} vulnerabilities: '
-                    f'Critical={vuln_summary["CRITICAL"]}, High={vuln_summary["HIGH"]}')
+    def _add_vulnerability(self, vuln_summary: Dict, vuln: Dict):
+        """
+        Count one finding and append its details to a vulnerability summary
+
+        Args:
+            vuln_summary: Summary from _new_vuln_summary
+            vuln: qscanner vulnerability item
+        """
+        raw_severity = vuln.get('severity', 'UNKNOWN')
+        # Direct lookup only for exact str/int values: lists and dicts are
+        # unhashable, and bools would match the 0/1 keys
+        if type(raw_severity) in (str, int):
+            severity = _SEV_MAP.get(raw_severity) or self._normalize_severity(raw_severity)
+        else:
+            severity = self._normalize_severity(raw_severity)
+        vuln_summary[severity] += 1
+        vuln_summary['total'] += 1
+
+        package = vuln.get('package')
+        if isinstance(package, dict):
+            package_name = package.get('name')
+            package_version = package.get('version')
+        else:
+            package_name = vuln.get('packageName')
+            package_version = vuln.get('packageVersion')
+
+        vuln_summary['details'].append({
+            'qid': vuln.get('qid') or vuln.get('id'),
+            'cve': vuln.get('cve') or vuln.get('cveId'),
+            'severity': severity,
+            'title': vuln.get('title') or vuln.get('name'),
+            'package': package_name,
+            'version': package_version,
+            'fixed_version': vuln.get('fixedVersion') or vuln.get('fix')
+        })
+
+    def _parse_vulnerabilities(self, scan_results: Dict) -> Dict:
+        """Parse vulnerability information from qscanner results"""
+        summaries = scan_results.get(_SUMMARY_KEY)
+        if summaries is not None:
+            vuln_summary = summaries['vulnerabilities']
+        else:
+            vuln_summary = self._new_vuln_summary()
+            for vuln in self._iter_report_items(scan_results, 'vulnerabilities'):
+                self._add_vulnerability(vuln_summary, vuln)
+
+        if logging.getLogger().isEnabledFor(logging.INFO):
+            logging.info('Parsed %s vulnerabilities: Critical=%s, High=%s',
+                         vuln_summary['total'], vuln_summary['CRITICAL'], vuln_summary['HIGH'])
 
         return vuln_summary
 
-    def _parse_compliance(self, scan_results: Dict) -> Dict:
-        """Parse compliance information from qscanner results"""
-        compliance = {
+    @staticmethod
+    def _new_compliance() -> Dict:
+        """Return an empty compliance summary"""
+        return {
             'passed': 0,
             'failed': 0,
             'total': 0,
             'checks': []
         }
 
-        compliance_checks = []
-        if 'compliance' in scan_results:
-            compliance_checks = scan_results['compliance']
-        elif 'results' in scan_results and 'compliance' in scan_results['results']:
-            compliance_checks = scan_results['results']['compliance']
+    @staticmethod
+    def _add_compliance_check(compliance: Dict, check: Dict):
+        """
+        Count one compliance check and append it to a compliance summary
 
-        for check in compliance_checks:
-            status = check.get('status', '').upper()
-            compliance['total'] += 1
+        Args:
+            compliance: Summary from _new_compliance
+            check: qscanner compliance item
+        """
+        status = check.get('status', '').upper()
+        compliance['total'] += 1
 
-            if status in ['PASS', 'PASSED']:
-                compliance['passed'] += 1
-            elif status in ['FAIL', 'FAILED']:
-                compliance['failed'] += 1
+        if status in ['PASS', 'PASSED']:
+            compliance['passed'] += 1
+        elif status in ['FAIL', 'FAILED']:
+            compliance['failed'] += 1
 
-            compliance['checks'].append({
-                'id': check.get('id') or check.get('checkId'),
-                'title': check.get('title') or check.get('name'),
-                'status': status,
-                'description': check.get('description')
-            })
+        compliance['checks'].append({
+            'id': check.get('id') or check.get('checkId'),
+            'title': check.get('title') or check.get('name'),
+            'status': status,
+            'description': check.get('description')
+        })
 
+    def _parse_compliance(self, scan_results: Dict) -> Dict:
+        """Parse compliance information from qscanner results"""
+        summaries = scan_results.get(_SUMMARY_KEY)
+        if summaries is not None:
+            return summaries['compliance']
+
+        compliance = self._new_compliance()
+        for check in self._iter_report_items(scan_results, 'compliance'):
+            self._add_compliance_check(compliance, check)
         return compliance
 
-    def _normalize_severity(self, severity: str) -> str:
+    @staticmethod
+    def _normalize_severity(severity: str) -> str:
         """Normalize severity levels"""
-        severity = str(severity).upper()
-
-        severity_map = {
-            '5': 'CRITICAL',
-            '4': 'HIGH',
-            '3': 'MEDIUM',
-            '2': 'LOW',
-            '1': 'INFORMATIONAL'
-        }
+        severity = severity.upper() if isinstance(severity, str) else str(severity).upper()
 
-        if severity in severity_map:
-            return severity_map[severity]
+        normalized = _SEV_MAP.get(severity)
+        if normalized:
+            return normalized
 
         if 'CRIT' in severity:
             return 'CRITICAL'
@@ -2,12 +2,92 @@
 Google Cloud Storage handler for scan results and metadata
 """
 import os
+import gzip
 import json
+import string
+import functools
 import logging
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+from google.api_core import exceptions
 from google.cloud import storage
-from google.cloud import firestore
+from google.cloud.storage.retry import DEFAULT_RETRY
+from requests.adapters import HTTPAdapter
+
+if TYPE_CHECKING:
+    from google.cloud import firestore
+
+try:
+    import orjson
+    _dumps = orjson.dumps
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+# Characters kept as-is in storage paths and Firestore fields
+_NAME_ALLOWED = frozenset(string.ascii_letters + string.digits + '-_.')
+_SANITIZE_TABLE = str.maketrans({chr(c): '_' for c in range(128) if chr(c) not in _NAME_ALLOWED})
+
+# Recent-scan answers shared by every handler in this instance:
+# (sanitized_name, hours) -> (monotonic time checked, was recently scanned)
+_RECENT_SCAN_CACHE: Dict[Tuple[str, int], Tuple[float, bool]] = {}
+_RECENT_CACHE_MAX_TTL = 60
+_NEGATIVE_CACHE_TTL = 5
+_RECENT_CACHE_MAX_ENTRIES = 4096
+
+# Recently saved errors: (image, error_type, hash(error)) -> monotonic time saved
+_ERROR_SEEN: 'OrderedDict[Tuple, float]' = OrderedDict()
+_ERROR_SEEN_LOCK = threading.Lock()
+_ERROR_DEDUP_TTL = 300
+_ERROR_SEEN_MAX_ENTRIES = 1024
+
+# Minimum resumable chunk size, instead of the library's larger default buffer
+_RESUMABLE_CHUNK_SIZE = 256 * 1024
+_UPLOAD_RETRY = DEFAULT_RETRY.with_deadline(30)
+
+# Concurrent saves and uploads; Cloud Storage advises at most 100 connections per client
+_UPLOAD_WORKERS = max(1, min(100, int(os.environ.get('GCS_UPLOAD_WORKERS', '8'))))
+_HTTP_POOL_SIZE = max(32, _UPLOAD_WORKERS)
+
+# Clients are shared across handlers so warm instances reuse connection pools
+_STORAGE_CLIENTS: Dict[str, storage.Client] = {}
+_FIRESTORE_CLIENTS: Dict[str, 'firestore.Client'] = {}
+# Save pool shared by every handler; threads are started on first use
+_SAVE_POOL: Optional[ThreadPoolExecutor] = None
+
+
+def _get_storage_client(project_id: str) -> storage.Client:
+    """Return the shared Cloud Storage client for a project"""
+    client = _STORAGE_CLIENTS.get(project_id)
+    if client is None:
+        client = storage.Client(project=project_id)
+        # Allow as many pooled connections as concurrent uploads
+        client._http.mount('https://', HTTPAdapter(pool_connections=_HTTP_POOL_SIZE,
+                                                   pool_maxsize=_HTTP_POOL_SIZE))
+        client = _STORAGE_CLIENTS.setdefault(project_id, client)
+    return client
+
+
+def _get_firestore_client(project_id: str) -> 'firestore.Client':
+    """Return the shared Firestore client for a project"""
+    client = _FIRESTORE_CLIENTS.get(project_id)
+    if client is None:
+        # Imported on first use; the gRPC stack is slow to load on cold starts
+        from google.cloud import firestore
+        client = _FIRESTORE_CLIENTS.setdefault(project_id, firestore.Client(project=project_id))
+    return client
+
+
+def _get_save_pool() -> ThreadPoolExecutor:
+    """Return the shared pool for parallel scan result saves"""
+    global _SAVE_POOL
+    if _SAVE_POOL is None:
+        _SAVE_POOL = ThreadPoolExecutor(max_workers=_UPLOAD_WORKERS)
+    return _SAVE_POOL
 
 
 class StorageHandler:
@@ -27,28 +107,71 @@ class StorageHandler:
         self.project_id = project_id
         self.bucket_name = bucket_name
 
-        self.storage_client = storage.Client(project=project_id)
-        self.firestore_client = firestore.Client(project=project_id)
+        self.storage_client = _get_storage_client(project_id)
+        self.bucket = self.storage_client.bucket(bucket_name)
+        # Created on first use so storage-only invocations skip loading Firestore
+        self._firestore_client = None
 
         # Collection names
         self.metadata_collection = 'scan_metadata'
+        self.latest_collection = 'scan_latest'
 
-        # Initialize storage
-        self._ensure_storage_exists()
+        # The bucket is provisioned at deploy time; only probe for it when asked to
+        if os.environ.get('ENSURE_BUCKET') == '1':
+            self._ensure_storage_exists()
+
+    @property
+    def firestore_client(self) -> 'firestore.Client':
+        """Firestore client, created on first access"""
+        if self._firestore_client is None:
+            self._firestore_client = _get_firestore_client(self.project_id)
+        return self._firestore_client
 
     def _ensure_storage_exists(self):
         """Create bucket if it doesn't exist"""
         try:
             # Check if bucket exists, create if not
-            bucket = self.storage_client.bucket(self.bucket_name)
-            if not bucket.exists():
-                bucket = self.storage_client.create_bucket(self.bucket_name)
-                logging.info(f'Created Cloud Storage bucket: {self.bucket_name}')
+            if not self.bucket.exists():
+                self.bucket = self.storage_client.create_bucket(self.bucket_name)
+                logging.info('Created Cloud Storage bucket: %s', self.bucket_name)
             else:
-                logging.debug(f'Bucket {self.bucket_name} already exists')
+                logging.debug('Bucket %s already exists', self.bucket_name)
 
         except Exception as e:
-            logging.warning(f'Error ensuring bucket exists: {str(e)}')
+            logging.warning('Error ensuring bucket exists: %s', e)
+
+    def _upload(self, blob: storage.Blob, data: Union[str, bytes], content_type: str = 'application/json',
+                if_generation_match: Optional[int] = None):
+        """
+        Upload data to a blob, creating the bucket if it does not exist yet
+
+        The library sends payloads up to 8 MiB as a single multipart request.
+        Larger ones use a resumable upload, here with the minimum chunk size
+        to cap buffer memory.
+        Metadata and content encoding must be set on the blob beforehand so they
+        are sent with the upload instead of a separate patch request.
+
+        Args:
+            blob: Target blob
+            data: Content to upload
+            content_type: Content type of the data
+            if_generation_match: Generation precondition; 0 only creates new objects
+        """
+        # Only affects resumable uploads
+        blob.chunk_size = _RESUMABLE_CHUNK_SIZE
+
+        try:
+            blob.upload_from_string(data, content_type=content_type, retry=_UPLOAD_RETRY,
+                                    if_generation_match=if_generation_match)
+        except exceptions.NotFound:
+            logging.warning('Bucket %s not found, creating it', self.bucket_name)
+            try:
+                self.storage_client.create_bucket(self.bucket_name)
+            except exceptions.Conflict:
+                # Another instance created it first
+                pass
+            blob.upload_from_string(data, content_type=content_type, retry=_UPLOAD_RETRY,
+                                    if_generation_match=if_generation_match)
 
     def save_scan_result(self, result: Dict):
         """
@@ -58,55 +181,134 @@ class StorageHandler:
             result: Scan result dictionary
         """
         try:
-            image = result.get('image', 'unknown')
-            scan_id = result.get('scan_id', datetime.utcnow().strftime('%Y%m%d%H%M%S'))
-            timestamp = result.get('timestamp', datetime.utcnow().isoformat())
-
-            # Save detailed results to Cloud Storage
-            blob_name = f'{self._sanitize_name(image)}/{scan_id}.json'
-            bucket = self.storage_client.bucket(self.bucket_name)
-            blob = bucket.blob(blob_name)
-
+            image, scan_id, timestamp = self._result_identity(result)
+            sanitized = self._sanitize_name(image)
+
+            # Save detailed results to Cloud Storage. A fresh blob per save with
+            # its metadata set up front keeps the upload to a single request.
+            blob_name = f'{sanitized}/{scan_id}.json.gz'
+            blob = self.bucket.blob(blob_name)
+            blob.content_encoding = 'gzip'
             blob.metadata = {
                 'image': image,
                 'scan_id': scan_id,
                 'timestamp': timestamp
             }
 
-            blob.upload_from_string(
-                json.dumps(result, indent=2),
-                content_type='application/json'
-            )
+            # Level 1 is nearly as fast as a copy and still shrinks scan JSON several times
+            body = gzip.compress(_dumps(result), compresslevel=1)
+            # A scan ID is written once; Cloud Storage rejects duplicates before
+            # anything is written to Firestore
+            try:
+                self._upload(blob, body, if_generation_match=0)
+            except exceptions.PreconditionFailed:
+                # A retried upload also gets 412 when its first attempt landed.
+                # That object is this save's, so go on to index it.
+                blob.reload()
+                stored = blob.metadata or {}
+                if stored.get('scan_id') != scan_id or stored.get('timestamp') != timestamp:
+                    logging.info('Scan result already saved, skipping: %s', blob_name)
+                    return
+
+            logging.info('Saved scan result to Cloud Storage: %s', blob_name)
+
+            # Save metadata and the image's latest scan time to Firestore in one commit
+            metadata = self._build_metadata(result, image, scan_id, timestamp, blob_name, sanitized)
+            batch = self.firestore_client.batch()
+            batch.set(self.firestore_client.collection(self.metadata_collection).document(scan_id), metadata)
+            batch.set(self.firestore_client.collection(self.latest_collection).document(sanitized),
+                      {'ts': metadata['timestamp_utc']}, merge=True)
+
+            batch.commit()
+            logging.info('Saved scan metadata to Firestore: %s', scan_id)
 
-            logging.info(f'Saved scan result to Cloud Storage: {blob_name}')
+        except Exception as e:
+            logging.error('Error saving scan result: %s', e)
+            raise
 
-            # Save metadata to Firestore
-            doc_ref = self.firestore_client.collection(self.metadata_collection).document(scan_id)
+    @staticmethod
+    def _result_identity(result: Dict) -> Tuple[str, str, str]:
+        """
+        Get the image, scan ID and timestamp of a scan result, with defaults
 
-            metadata = {
-                'image': image,
-                'scan_id': scan_id,
-                'timestamp': firestore.SERVER_TIMESTAMP,
-                'timestamp_str': timestamp,
-                'status': result.get('status', 'UNKNOWN'),
-                'container_type': result.get('container_type', 'UNKNOWN'),
-                'vuln_critical': result.get('vulnerabilities', {}).get('CRITICAL', 0),
-                'vuln_high': result.get('vulnerabilities', {}).get('HIGH', 0),
-                'vuln_medium': result.get('vulnerabilities', {}).get('MEDIUM', 0),
-                'vuln_low': result.get('vulnerabilities', {}).get('LOW', 0),
-                'vuln_total': result.get('vulnerabilities', {}).get('total', 0),
-                'compliance_passed': result.get('compliance', {}).get('passed', 0),
-                'compliance_failed': result.get('compliance', {}).get('failed', 0),
-                'blob_path': blob_name,
-                'sanitized_image_name': self._sanitize_name(image)
-            }
+        Args:
+            result: Scan result dictionary
 
-            doc_ref.set(metadata)
-            logging.info(f'Saved scan metadata to Firestore: {scan_id}')
+        Returns:
+            Tuple of (image, scan_id, timestamp)
+        """
+        image = result.get('image', 'unknown')
+        scan_id = result.get('scan_id')
+        timestamp = result.get('timestamp')
+        if not scan_id or not timestamp:
+            now = datetime.now(timezone.utc)
+            scan_id = scan_id or now.strftime('%Y%m%d%H%M%S')
+            timestamp = timestamp or now.isoformat()
+        return image, scan_id, timestamp
+
+    @staticmethod
+    def _build_metadata(result: Dict, image: str, scan_id: str, timestamp: str,
+                        blob_name: str, sanitized: str) -> Dict:
+        """
+        Build the Firestore metadata document for a scan result
 
-        except Exception as e:
-            logging.error(f'Error saving scan result: {str(e)}')
-            raise
+        Args:
+            result: Scan result dictionary
+            image: Image name
+            scan_id: Scan ID
+            timestamp: Scan timestamp
+            blob_name: Cloud Storage object holding the full result
+            sanitized: Sanitized image name
+
+        Returns:
+            Metadata dictionary
+        """
+        vulns = result.get('vulnerabilities') or {}
+        comp = result.get('compliance') or {}
+        now_dt = datetime.now(timezone.utc)
+
+        return {
+            'image': image,
+            'scan_id': scan_id,
+            'timestamp': now_dt,
+            'timestamp_str': timestamp,
+            'timestamp_utc': now_dt,
+            'status': result.get('status', 'UNKNOWN'),
+            'container_type': result.get('container_type', 'UNKNOWN'),
+            'vuln_critical': vulns.get('CRITICAL', 0),
+            'vuln_high': vulns.get('HIGH', 0),
+            'vuln_medium': vulns.get('MEDIUM', 0),
+            'vuln_low': vulns.get('LOW', 0),
+            'vuln_total': vulns.get('total', 0),
+            'compliance_passed': comp.get('passed', 0),
+            'compliance_failed': comp.get('failed', 0),
+            'blob_path': blob_name,
+            'sanitized_image_name': sanitized
+        }
+
+    def save_scan_results(self, results: List[Dict]) -> List[Tuple[Dict, Exception]]:
+        """
+        Save multiple scan results in parallel on the shared worker pool
+
+        Args:
+            results: Scan result dictionaries
+
+        Returns:
+            List of (result, exception) pairs for results that failed to save
+        """
+        if not results:
+            return []
+
+        failures = []
+        pool = _get_save_pool()
+        futures = {pool.submit(self.save_scan_result, result): result for result in results}
+        for future in as_completed(futures):
+            try:
+                future.result()
+            except Exception as e:
+                failures.append((futures[future], e))
+
+        return failures
 
     def save_error(self, error_info: Dict):
         """
@@ -115,24 +317,35 @@ class StorageHandler:
         Args:
             error_info: Error details dictionary
         """
+        # Suppress repeats of the same error so a failure loop doesn't flood the bucket
+        key = (error_info.get('image'), error_info.get('error_type'),
+               hash(str(error_info.get('error', ''))))
+        with _ERROR_SEEN_LOCK:
+            seen = _ERROR_SEEN.get(key)
+        if seen is not None and time.monotonic() - seen < _ERROR_DEDUP_TTL:
+            return
+
         try:
-            timestamp = error_info.get('timestamp', datetime.utcnow().isoformat())
+            timestamp = error_info.get('timestamp') or datetime.now(timezone.utc).isoformat()
             image = error_info.get('image', 'unknown')
 
-            # Save to Cloud Storage
-            blob_name = f'errors/{self._sanitize_name(image)}/{timestamp}.json'
-            bucket = self.storage_client.bucket(self.bucket_name)
-            blob = bucket.blob(blob_name)
+            # Save to Cloud Storage; object names use 'Z' rather than a '+00:00' offset
+            blob_name = f"errors/{self._sanitize_name(image)}/{timestamp.replace('+00:00', 'Z')}.json"
+            blob = self.bucket.blob(blob_name)
+
+            self._upload(blob, _dumps(error_info))
 
-            blob.upload_from_string(
-                json.dumps(error_info, indent=2),
-                content_type='application/json'
-            )
+            # Only a saved error suppresses its repeats
+            with _ERROR_SEEN_LOCK:
+                _ERROR_SEEN[key] = time.monotonic()
+                _ERROR_SEEN.move_to_end(key)
+                while len(_ERROR_SEEN) > _ERROR_SEEN_MAX_ENTRIES:
+                    _ERROR_SEEN.popitem(last=False)
 
-            logging.info(f'Saved error info to Cloud Storage: {blob_name}')
+            logging.info('Saved error info to Cloud Storage: %s', blob_name)
 
         except Exception as e:
-            logging.error(f'Error saving error info: {str(e)}')
+            logging.error('Error saving error info: %s', e)
 
     def is_recently_scanned(self, image: str, hours: Optional[int] = None) -> bool:
         """
@@ -149,30 +362,42 @@ class StorageHandler:
             if hours is None:
                 hours = int(os.environ.get('SCAN_CACHE_HOURS', '24'))
 
-            # Query recent scans from Firestore
-            cutoff_time = datetime.utcnow() - timedelta(hours=hours)
             sanitized_name = self._sanitize_name(image)
 
-            # Query for recent scans of this image
-            docs = self.firestore_client.collection(self.metadata_collection) \
-                .where('sanitized_image_name', '==', sanitized_name) \
-                .where('timestamp_str', '>=', cutoff_time.isoformat()) \
-                .limit(1) \
-                .stream()
+            # Answer repeated checks from the in-process cache
+            key = (sanitized_name, hours)
+            now = time.monotonic()
+            cached = _RECENT_SCAN_CACHE.get(key)
+            if cached is not None:
+                checked_at, recent = cached
+                ttl = min(_RECENT_CACHE_MAX_TTL, hours * 360) if recent else _NEGATIVE_CACHE_TTL
+                if now - checked_at < ttl:
+                    return recent
 
-            results = list(docs)
+            cutoff_time = datetime.now(timezone.utc) - timedelta(hours=hours)
 
-            if results:
-                logging.info(f'Found recent scan for {image}')
-                return True
+            # Point-read the image's latest scan time instead of querying scan metadata
+            snap = self.firestore_client.collection(self.latest_collection) \
+                .document(sanitized_name) \
+                .get(field_paths=['ts'])
+            recent = snap.exists and snap.get('ts') >= cutoff_time
 
-            return False
+            if len(_RECENT_SCAN_CACHE) >= _RECENT_CACHE_MAX_ENTRIES:
+                _RECENT_SCAN_CACHE.clear()
+            _RECENT_SCAN_CACHE[key] = (now, recent)
+
+            if recent:
+                logging.info('Found recent scan for %s', image)
+
+            return recent
 
         except Exception as e:
-            logging.warning(f'Error checking recent scans: {str(e)}')
+            logging.warning('Error checking recent scans: %s', e)
             return False
 
-    def _sanitize_name(self, name: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _sanitize_name(name: str) -> str:
         """
         Sanitize name for use in Cloud Storage paths and Firestore
 
@@ -182,8 +407,5 @@ class StorageHandler:
         Returns:
             Sanitized name
         """
-        # Replace special characters with underscores
-        sanitized = name.replace('/', '_').replace(':', '_').replace('@', '_')
-        # Remove any remaining invalid characters
-        sanitized = ''.join(c if c.isalnum() or c in '-_.' else '_' for c in sanitized)
-        return sanitized
+        # Replace '/', ':', '@' and any other invalid ASCII characters with underscores
+        return name.translate(_SANITIZE_TABLE)